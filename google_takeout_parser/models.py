@@ -3,6 +3,13 @@ Models for the data parsed by this module
 
 Each top-level dataclass here has a 'key' property
 which determines unique events while merging
+
+The timestamp used in the key (and Activity.products_desc) is computed
+once when the model is created, since the key is checked for every event.
+So, the models should not be modified after they're created
+
+The models define __slots__ (dataclass(slots=True) requires python3.10)
+since there can be millions of them (e.g. Location) in memory at once
 """
 
 from __future__ import annotations
@@ -20,20 +27,21 @@ from typing import (
     NamedTuple,
 )
 from dataclasses import dataclass
+from functools import lru_cache
 
 from .common import Res
 
 Url = str
 
 
+@lru_cache(maxsize=None)
 def get_union_args(cls: Any) -> Optional[Tuple[Type]]:  # type: ignore[type-arg]
     if getattr(cls, "__origin__", None) != Union:
         return None
 
-    args = cls.__args__
-    args = [e for e in args if e != type(None)]  # noqa: E721
+    args = tuple(e for e in cls.__args__ if e is not type(None))
     assert len(args) > 0
-    return args  # type: ignore
+    return args
 
 
 class Subtitles(NamedTuple):
@@ -49,6 +57,8 @@ class LocationInfo(NamedTuple):
 
 
 class BaseEvent(Protocol):
+    __slots__ = ()
+
     @property
     def key(self) -> Any:
         ...
@@ -56,6 +66,20 @@ class BaseEvent(Protocol):
 
 @dataclass
 class Activity(BaseEvent):
+    __slots__ = (
+        "header",
+        "title",
+        "time",
+        "description",
+        "titleUrl",
+        "subtitles",
+        "details",
+        "locationInfos",
+        "products",
+        "_ts",
+        "_products_desc",
+    )
+
     header: str
     title: str
     time: datetime
@@ -69,68 +93,102 @@ class Activity(BaseEvent):
     locationInfos: List[LocationInfo]
     products: List[str]
 
+    def __post_init__(self) -> None:
+        self._ts = int(self.time.timestamp())
+        self._products_desc = ", ".join(sorted(self.products))
+
     @property
     def dt(self) -> datetime:
         return self.time
 
     @property
     def products_desc(self) -> str:
-        return ", ".join(sorted(self.products))
+        return self._products_desc
 
     @property
     def key(self) -> Tuple[str, str, int]:
-        return self.header, self.title, int(self.time.timestamp())
+        return self.header, self.title, self._ts
 
 
 @dataclass
 class YoutubeComment(BaseEvent):
+    __slots__ = ("content", "dt", "urls", "_ts")
+
     content: str
     dt: datetime
     urls: List[Url]
 
+    def __post_init__(self) -> None:
+        self._ts = int(self.dt.timestamp())
+
     @property
     def key(self) -> int:
-        return int(self.dt.timestamp())
+        return self._ts
 
 
 @dataclass
 class LikedYoutubeVideo(BaseEvent):
+    __slots__ = ("title", "desc", "link", "dt", "_ts")
+
     title: str
     desc: str
     link: str
     dt: datetime
 
+    def __post_init__(self) -> None:
+        self._ts = int(self.dt.timestamp())
+
     @property
     def key(self) -> int:
-        return int(self.dt.timestamp())
+        return self._ts
 
 
 @dataclass
 class PlayStoreAppInstall(BaseEvent):
+    __slots__ = ("title", "dt", "device_name", "_ts")
+
     title: str
     dt: datetime
     device_name: Optional[str]
 
+    def __post_init__(self) -> None:
+        self._ts = int(self.dt.timestamp())
+
     @property
     def key(self) -> int:
-        return int(self.dt.timestamp())
+        return self._ts
 
 
 @dataclass
 class Location(BaseEvent):
+    __slots__ = ("lat", "lng", "accuracy", "dt", "_ts")
+
     lat: float
     lng: float
     accuracy: Optional[float]
     dt: datetime
 
+    def __post_init__(self) -> None:
+        self._ts = int(self.dt.timestamp())
+
     @property
     def key(self) -> Tuple[float, float, Optional[float], int]:
-        return self.lat, self.lng, self.accuracy, int(self.dt.timestamp())
+        return self.lat, self.lng, self.accuracy, self._ts
 
 
 # this is not cached as a model, its saved as JSON -- its a helper class that placevisit uses
 @dataclass
 class CandidateLocation:
+    __slots__ = (
+        "lat",
+        "lng",
+        "address",
+        "name",
+        "placeId",
+        "locationConfidence",
+        "sourceInfoDeviceTag",
+    )
+
     lat: float
     lng: float
     address: Optional[str]
@@ -141,17 +199,24 @@ class CandidateLocation:
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> CandidateLocation:
+        # called for every candidate in semantic location history, so this
+        # passes the fields positionally (in field order) instead of as keywords
+        get = data.get
+        sourceInfo = get("sourceInfo")
+        # streamed with ijson, so this is a Decimal
+        locationConfidence = get("locationConfidence")
         return cls(
-            address=data.get("address"),
-            name=data.get("name"),
-            placeId=data["placeId"],
-            locationConfidence=data.get("locationConfidence"),
-            lat=data["latitudeE7"] / 1e7,
-            lng=data["longitudeE7"] / 1e7,
-            sourceInfoDeviceTag=data.get("sourceInfo", {}).get("deviceTag"),
+            data["latitudeE7"] / 1e7,  # lat
+            data["longitudeE7"] / 1e7,  # lng
+            get("address"),
+            get("name"),
+            data["placeId"],
+            None if locationConfidence is None else float(locationConfidence),
+            None if sourceInfo is None else sourceInfo.get("deviceTag"),
         )
 
 
+# no __slots__ here, placeVisitImportance has a default which would conflict with the slot
 @dataclass
 class PlaceVisit(BaseEvent):
     # these are part of the 'location' key
@@ -178,20 +243,28 @@ class PlaceVisit(BaseEvent):
     def dt(self) -> datetime:  # type: ignore[override]
         return self.startTime
 
+    def __post_init__(self) -> None:
+        self._ts = int(self.startTime.timestamp())
+
     @property
     def key(self) -> Tuple[float, float, int, Optional[float]]:
-        return self.lat, self.lng, int(self.startTime.timestamp()), self.visitConfidence
+        return self.lat, self.lng, self._ts, self.visitConfidence
 
 
 @dataclass
 class ChromeHistory(BaseEvent):
+    __slots__ = ("title", "url", "dt", "_ts")
+
     title: str
     url: Url
     dt: datetime
 
+    def __post_init__(self) -> None:
+        self._ts = int(self.dt.timestamp())
+
     @property
     def key(self) -> Tuple[str, int]:
-        return self.url, int(self.dt.timestamp())
+        return self.url, self._ts
 
 
 # can't compute this dynamically -- have to write it out
@@ -2,10 +2,13 @@
 Lots of functions to transform the JSON from the Takeout to useful information
 """
 
-import json
+import sys
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Iterator, Any, Dict, Iterable, Optional, List
+from typing import Iterator, Any, Dict, FrozenSet, Optional, List, Tuple
+
+import ijson  # type: ignore[import]
 
 from .http_allowlist import convert_to_https_opt
 from .time_utils import parse_datetime_millis
@@ -24,14 +27,37 @@ from .models import (
 from .common import Res
 from .time_utils import parse_json_utc_date
 
+# orjson is an optional dependency, is a lot faster than the stdlib json
+# module for the large (multiple hundred MB) location history files
+# both accept bytes, so we can skip decoding the file to a str first
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads  # type: ignore[assignment]
+
+
+# fields which only have a few distinct values (e.g. 'YouTube', 'HIGH_CONFIDENCE')
+# are interned, so all the events share one string instead of a copy each
+_intern = sys.intern
+
+
+def _intern_opt(s: Optional[str]) -> Optional[str]:
+    return None if s is None else _intern(s)
+
 
 # "YouTube and YouTube Music/history/search-history.json"
 # "YouTube and YouTube Music/history/watch-history.json"
 # This is also the 'My Activity' JSON format
 def _parse_json_activity(p: Path) -> Iterator[Res[Activity]]:
-    json_data = json.loads(p.read_text())
+    json_data = _loads(p.read_bytes())
     if not isinstance(json_data, list):
         yield RuntimeError(f"Activity: Top level item in '{p}' isn't a list")
+        return
+    # bind to locals, these are looked up a few times for each item
+    to_https = convert_to_https_opt
+    parse_dt = parse_json_utc_date
+    # create the NamedTuples positionally, skipping the keyword handling in their __new__
+    new_tuple = tuple.__new__
     for blob in json_data:
         try:
             subtitles: List[Subtitles] = []
@@ -41,7 +67,7 @@ def _parse_json_activity(p: Path) -> Iterator[Res[Activity]]:
                 # sometimes it's just empty ("My Activity/Assistant" data circa 2018)
                 if "name" not in s:
                     continue
-                subtitles.append(Subtitles(name=s["name"], url=s.get("url")))
+                subtitles.append(new_tuple(Subtitles, (s["name"], s.get("url"))))
 
             # till at least 2017
             old_format = "snippet" in blob
@@ -53,24 +79,31 @@ def _parse_json_activity(p: Path) -> Iterator[Res[Activity]]:
                 header = blob["header"]
                 time_str = blob["time"]
 
+            details: List[str] = []
+            for d in blob.get("details", ()):
+                # almost always a dict with a name, so skip checking that up front
+                try:
+                    details.append(d["name"])
+                except (TypeError, KeyError):
+                    pass
+
             yield Activity(
-                header=header,
+                header=_intern(header),
                 title=blob["title"],
-                titleUrl=convert_to_https_opt(blob.get("titleUrl")),
+                titleUrl=to_https(blob.get("titleUrl")),
                 description=blob.get("description"),
-                time=parse_json_utc_date(time_str),
+                time=parse_dt(time_str),
                 subtitles=subtitles,
-                details=[
-                    d["name"]
-                    for d in blob.get("details", [])
-                    if isinstance(d, dict) and "name" in d
-                ],
+                details=details,
                 locationInfos=[
-                    LocationInfo(
-                        name=locinfo.get("name"),
-                        url=convert_to_https_opt(locinfo.get("url")),
-                        source=locinfo.get("source"),
-                        sourceUrl=convert_to_https_opt(locinfo.get("sourceUrl")),
+                    new_tuple(
+                        LocationInfo,
+                        (
+                            locinfo.get("name"),
+                            to_https(locinfo.get("url")),
+                            _intern_opt(locinfo.get("source")),
+                            to_https(locinfo.get("sourceUrl")),
+                        ),
                     )
                     for locinfo in blob.get("locationInfos", [])
                 ],
@@ -81,9 +114,10 @@ def _parse_json_activity(p: Path) -> Iterator[Res[Activity]]:
 
 
 def _parse_likes(p: Path) -> Iterator[Res[LikedYoutubeVideo]]:
-    json_data = json.loads(p.read_text())
+    json_data = _loads(p.read_bytes())
     if not isinstance(json_data, list):
         yield RuntimeError(f"Likes: Top level item in '{p}' isn't a list")
+        return
     for jlike in json_data:
         try:
             yield LikedYoutubeVideo(
@@ -99,9 +133,10 @@ def _parse_likes(p: Path) -> Iterator[Res[LikedYoutubeVideo]]:
 
 
 def _parse_app_installs(p: Path) -> Iterator[Res[PlayStoreAppInstall]]:
-    json_data = json.loads(p.read_text())
+    json_data = _loads(p.read_bytes())
     if not isinstance(json_data, list):
         yield RuntimeError(f"App installs: Top level item in '{p}' isn't a list")
+        return
     for japp in json_data:
         try:
             yield PlayStoreAppInstall(
@@ -113,70 +148,156 @@ def _parse_app_installs(p: Path) -> Iterator[Res[PlayStoreAppInstall]]:
             yield e
 
 
+# timeline objects often share boundary timestamps (one ends when the next starts),
+# and datetimes are immutable, so the parsed values can be shared
+_parse_datetime_millis_cached = lru_cache(maxsize=8192)(parse_datetime_millis)
+_parse_json_utc_date_cached = lru_cache(maxsize=8192)(parse_json_utc_date)
+
+
 def _parse_timestamp_key(d: Dict[str, Any], key: str) -> datetime:
-    if f"{key}Ms" in d:
-        return parse_datetime_millis(d[f"{key}Ms"])
+    ms = d.get(key + "Ms")
+    if ms is not None:
+        return _parse_datetime_millis_cached(ms)
     else:
         # else should be the isoformat
-        return parse_json_utc_date(d[key])
+        return _parse_json_utc_date_cached(d[key])
+
+
+# the streamed files can be hundreds of MB, so read them in large chunks
+# ijson does its own reads of buf_size (64KB by default) from the file, so
+# this doesn't need to be passed to open() (which zipfile.Path.open doesn't accept)
+_STREAM_BUFFER_SIZE = 1 << 20
+
+
+def _stream_list(p: Path, key: str) -> Iterator[Any]:
+    """
+    Stream the items from the list at 'key' in the top-level JSON object,
+    so only one item is in memory at a time instead of the entire file
+
+    Non-integer numbers are returned as Decimal (use_float=True makes the C
+    backends overflow on integers wider than 64 bits, e.g. some 'deviceTag'
+    values), so the parsers convert those fields with float()
+    """
+    with p.open("rb") as f:
+        yield from ijson.items(f, f"{key}.item", buf_size=_STREAM_BUFFER_SIZE)
+
+
+def _check_top_level_key(p: Path, key: str, name: str) -> Optional[RuntimeError]:
+    """
+    Called when nothing was streamed from a file, to check whether
+    the list was just empty or the file has some unexpected structure
+    """
+    json_data = _loads(p.read_bytes())
+    if not isinstance(json_data, dict):
+        return RuntimeError(f"{name}: Top level item in '{p}' isn't a dict")
+    if key not in json_data:
+        return RuntimeError(f"{name}: no '{key}' key in '{p}'")
+    return None
 
 
 def _parse_location_history(p: Path) -> Iterator[Res[Location]]:
     ### HMMM, seems that all the locations are right after one another. broken? May just be all the location history that google has on me
     ### see numpy.diff(list(map(lambda yy: y.at, filter(lambda y: isinstance(Location), events()))))
-    json_data = json.loads(p.read_text())
-    if "locations" not in json_data:
-        yield RuntimeError(f"Locations: no 'locations' key in '{p}'")
-    for loc in json_data.get("locations", []):
-        accuracy = loc.get("accuracy")
+    found = False
+    # this runs for every point, which can be millions of items,
+    # so bind everything to locals and pass the fields positionally
+    parse_millis = parse_datetime_millis
+    parse_dt = parse_json_utc_date
+    for loc in _stream_list(p, "locations"):
+        found = True
+        get = loc.get
+        accuracy = get("accuracy")
+        # older exports have 'timestampMs', newer ones have an isoformat 'timestamp'
+        timestamp_ms = get("timestampMs")
         try:
             yield Location(
-                lng=float(loc["longitudeE7"]) / 1e7,
-                lat=float(loc["latitudeE7"]) / 1e7,
-                dt=_parse_timestamp_key(loc, "timestamp"),
-                accuracy=None if accuracy is None else float(accuracy),
+                float(loc["latitudeE7"]) / 1e7,  # lat
+                float(loc["longitudeE7"]) / 1e7,  # lng
+                None if accuracy is None else float(accuracy),
+                parse_dt(loc["timestamp"])
+                if timestamp_ms is None
+                else parse_millis(timestamp_ms),
             )
         except Exception as e:
             yield e
+    if not found:
+        err = _check_top_level_key(p, "locations", "Locations")
+        if err is not None:
+            yield err
 
 
-_sem_required_keys = ["location", "duration"]
-_sem_required_location_keys = [
+_sem_required_keys = ("location", "duration")
+_sem_required_location_keys = (
     "placeId",  # some fairly recent (as of 2023) places might miss it
     "latitudeE7",
     "longitudeE7",
-]
+)
+# the same keys as sets, for the superset check
+_sem_required_keys_set = frozenset(_sem_required_keys)
+_sem_required_location_keys_set = frozenset(_sem_required_location_keys)
 
 
 def _check_required_keys(
-    d: Dict[str, Any], required_keys: Iterable[str]
+    d: Dict[str, Any], required_keys: Tuple[str, ...], required_set: FrozenSet[str]
 ) -> Optional[str]:
-    for k in required_keys:
-        if k not in d:
-            return k
-    return None
+    # one superset check in C for the common case, where everything is present
+    if d.keys() >= required_set:
+        return None
+    # report the first missing key, in the order they're listed in
+    return next(k for k in required_keys if k not in d)
+
+
+def _parse_place_visit(
+    placeVisit: Dict[str, Any], location: CandidateLocation
+) -> PlaceVisit:
+    duration = placeVisit["duration"]
+    centerLat = placeVisit.get("centerLatE7")
+    centerLng = placeVisit.get("centerLngE7")
+    visitConfidence = placeVisit.get("visitConfidence")
+    from_dict = CandidateLocation.from_dict
+    return PlaceVisit(
+        name=location.name,
+        address=location.address,
+        otherCandidateLocations=[
+            from_dict(pv) for pv in placeVisit.get("otherCandidateLocations", [])
+        ],
+        sourceInfoDeviceTag=location.sourceInfoDeviceTag,
+        placeConfidence=_intern_opt(placeVisit.get("placeConfidence")),
+        placeVisitImportance=_intern_opt(placeVisit.get("placeVisitImportance")),
+        placeVisitType=_intern_opt(placeVisit.get("placeVisitType")),
+        visitConfidence=None if visitConfidence is None else float(visitConfidence),
+        editConfirmationStatus=_intern_opt(placeVisit.get("editConfirmationStatus")),
+        placeId=location.placeId,
+        lng=location.lng,
+        lat=location.lat,
+        centerLat=None if centerLat is None else float(centerLat) / 1e7,
+        centerLng=None if centerLng is None else float(centerLng) / 1e7,
+        startTime=_parse_timestamp_key(duration, "startTimestamp"),
+        endTime=_parse_timestamp_key(duration, "endTimestamp"),
+        locationConfidence=location.locationConfidence,
+    )
 
 
 def _parse_semantic_location_history(p: Path) -> Iterator[Res[PlaceVisit]]:
-    json_data = json.loads(p.read_text())
-    if not isinstance(json_data, dict):
-        yield RuntimeError(f"Locations: Top level item in '{p}' isn't a dict")
-    if "timelineObjects" not in json_data:
-        yield RuntimeError(f"Locations: no 'timelineObjects' key in '{p}'")
-    timelineObjects = json_data.get("timelineObjects", [])
-    for timelineObject in timelineObjects:
-        if "placeVisit" not in timelineObject:
+    found = False
+    for timelineObject in _stream_list(p, "timelineObjects"):
+        found = True
+        placeVisit = timelineObject.get("placeVisit")
+        if placeVisit is None:
             # yield RuntimeError(f"PlaceVisit: no 'placeVisit' key in '{p}'")
             continue
-        placeVisit = timelineObject["placeVisit"]
-        missing_key = _check_required_keys(placeVisit, _sem_required_keys)
-        if missing_key is not None:
-            yield RuntimeError(f"PlaceVisit: no '{missing_key}' key in '{p}'")
-            continue
         try:
+            missing_key = _check_required_keys(
+                placeVisit, _sem_required_keys, _sem_required_keys_set
+            )
+            if missing_key is not None:
+                yield RuntimeError(f"PlaceVisit: no '{missing_key}' key in '{p}'")
+                continue
             location_json = placeVisit["location"]
             missing_location_key = _check_required_keys(
-                location_json, _sem_required_location_keys
+                location_json,
+                _sem_required_location_keys,
+                _sem_required_location_keys_set,
             )
             if missing_location_key is not None:
                 # handle these fully defensively, since nothing at all we can do if it's missing these properties
@@ -184,55 +305,33 @@ def _parse_semantic_location_history(p: Path) -> Iterator[Res[PlaceVisit]]:
                     f"CandidateLocation: {p}, no key '{missing_location_key}' in {location_json}"
                 )
                 continue
-            location = CandidateLocation.from_dict(location_json)
-            duration = placeVisit["duration"]
-            yield PlaceVisit(
-                name=location.name,
-                address=location.address,
-                # separators=(",", ":") removes whitespace from json.dumps
-                otherCandidateLocations=[
-                    CandidateLocation.from_dict(pv)
-                    for pv in placeVisit.get("otherCandidateLocations", [])
-                ],
-                sourceInfoDeviceTag=location.sourceInfoDeviceTag,
-                placeConfidence=placeVisit.get("placeConfidence"),
-                placeVisitImportance=placeVisit.get("placeVisitImportance"),
-                placeVisitType=placeVisit.get("placeVisitType"),
-                visitConfidence=placeVisit.get("visitConfidence"),
-                editConfirmationStatus=placeVisit.get("editConfirmationStatus"),
-                placeId=location.placeId,
-                lng=location.lng,
-                lat=location.lat,
-                centerLat=float(placeVisit["centerLatE7"]) / 1e7
-                if "centerLatE7" in placeVisit
-                else None,
-                centerLng=float(placeVisit["centerLngE7"]) / 1e7
-                if "centerLngE7" in placeVisit
-                else None,
-                startTime=_parse_timestamp_key(duration, "startTimestamp"),
-                endTime=_parse_timestamp_key(duration, "endTimestamp"),
-                locationConfidence=location.locationConfidence,
+            yield _parse_place_visit(
+                placeVisit, CandidateLocation.from_dict(location_json)
             )
         except Exception as e:
             if isinstance(e, KeyError):
                 yield RuntimeError(f"PlaceVisit: {p}, no key '{e}' in {placeVisit}")
             else:
                 yield e
+    if not found:
+        err = _check_top_level_key(p, "timelineObjects", "Locations")
+        if err is not None:
+            yield err
 
 
 def _parse_chrome_history(p: Path) -> Iterator[Res[ChromeHistory]]:
-    json_data = json.loads(p.read_text())
+    json_data = _loads(p.read_bytes())
     if "Browser History" not in json_data:
         yield RuntimeError(f"Chrome/BrowserHistory: no 'Browser History' key in '{p}'")
-    for item in json_data.get("Browser History", []):
+        return
+    for item in json_data["Browser History"]:
         try:
-            time_naive = datetime.utcfromtimestamp(item["time_usec"] / 10**6)
             yield ChromeHistory(
                 title=item["title"],
                 # dont convert to https here, this is just the users history
                 # and there's likely lots of items that aren't https
                 url=item["url"],
-                dt=time_naive.replace(tzinfo=timezone.utc),
+                dt=datetime.fromtimestamp(item["time_usec"] / 10**6, tz=timezone.utc),
             )
         except Exception as e:
             yield e
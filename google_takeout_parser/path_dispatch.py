@@ -4,8 +4,13 @@ This file loads and parses files according to a localized HandlerMap
 
 import os
 import re
+import stat
 from pathlib import Path
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 from typing import (
+    ContextManager,
+    Deque,
     Sequence,
     Iterator,
     Dict,
@@ -19,7 +24,7 @@ from typing import (
     Literal,
 )
 
-from collections import defaultdict
+from collections import defaultdict, deque
 
 from cachew import cachew
 
@@ -33,6 +38,7 @@ from .locales.main import LOCALES, get_paths_for_functions
 from .cache import takeout_cache_path
 from .log import logger
 from .models import BaseEvent, get_union_args
+from .parse_json import _parse_location_history
 
 
 CacheKey = Tuple[Type[BaseEvent], ...]
@@ -107,6 +113,8 @@ def _cache_key_to_type(c: CacheKey) -> Any:
 
 HandlerMatch = Res[Optional[HandlerFunction]]
 
+FileHandlers = List[Tuple[Path, HandlerFunction]]
+
 ErrorPolicy = Literal["yield", "raise", "drop"]
 
 
@@ -131,6 +139,26 @@ def _handler_map_to_list(
     return handlers
 
 
+# these stream one large file (Location History can be hundreds of MB) item by item.
+# in a worker, all of the results would be collected into a list and pickled back
+# at once, which is slower and uses more memory than just parsing it here
+_IN_PROCESS_HANDLERS = frozenset({_parse_location_history})
+
+
+def _parse_file(handler: HandlerFunction, path: Path) -> List[Res[BaseEvent]]:
+    """Runs in a worker process, parses the entire file so the results can be sent back"""
+    return list(handler(path))
+
+
+def _process_pool(
+    workers: Optional[int]
+) -> ContextManager[Optional[ProcessPoolExecutor]]:
+    """One pool to parse all the files with, or None to parse them in this process"""
+    if workers is None:
+        return nullcontext()
+    return ProcessPoolExecutor(max_workers=workers)
+
+
 class TakeoutParser:
     def __init__(
         self,
@@ -338,13 +366,70 @@ class TakeoutParser:
         func_name: str = getattr(handler, "__name__", str(handler))
         logger.info(f"Parsing '{rel_path}' using '{func_name}'")
 
-    def _parse_raw(self, filter_type: FilterType = None) -> BaseResults:
+    def _parse_files(
+        self,
+        file_handlers: FileHandlers,
+        executor: Optional[ProcessPoolExecutor] = None,
+        workers: int = 1,
+    ) -> BaseResults:
+        """
+        Parse each of these files with its handler, in order
+
+        If an executor is given, parses the files in parallel in its processes,
+        with at most 'workers' files submitted at a time, so that parsed results
+        don't pile up in memory faster than they're consumed.
+        Each file is parsed completely in the worker and the results are sent back,
+        so the handlers have to be picklable (i.e. defined at the top level of a module).
+        Files with one of the _IN_PROCESS_HANDLERS are still parsed in this process
+        """
+        if executor is None:
+            for path, handler in file_handlers:
+                self._log_handler(path, handler)
+                yield from handler(path)
+            return
+
+        # the future is None for files which are parsed in this process
+        pending: Deque[Tuple[Path, HandlerFunction, Optional[Any]]] = deque()
+        try:
+            for path, handler in file_handlers:
+                if handler in _IN_PROCESS_HANDLERS:
+                    pending.append((path, handler, None))
+                else:
+                    pending.append(
+                        (path, handler, executor.submit(_parse_file, handler, path))
+                    )
+                while sum(f is not None for _, _, f in pending) >= workers:
+                    yield from self._next_results(pending)
+            while pending:
+                yield from self._next_results(pending)
+        finally:
+            # if the results weren't consumed completely, dont wait on the rest
+            for _, _, future in pending:
+                if future is not None:
+                    future.cancel()
+
+    def _next_results(
+        self, pending: Deque[Tuple[Path, HandlerFunction, Optional[Any]]]
+    ) -> BaseResults:
+        """Yield the results for the oldest file submitted in _parse_files"""
+        path, handler, future = pending.popleft()
+        self._log_handler(path, handler)
+        if future is None:
+            yield from handler(path)
+        else:
+            yield from future.result()
+
+    def _parse_raw(
+        self, filter_type: FilterType = None, workers: Optional[int] = None
+    ) -> BaseResults:
         """Parse the takeout with no cache. If a filter is specified, only parses those files"""
         handlers = self._group_by_return_type(filter_type=filter_type)
-        for _, result_tuples in handlers.items():
-            for path, itr in result_tuples:
-                self._log_handler(path, itr)
-                yield from itr
+        # parse every file in one pass, so the pool is shared by all the groups
+        file_handlers = [fh for group in handlers.values() for fh in group]
+        with _process_pool(workers) as executor:
+            yield from self._parse_files(
+                file_handlers, executor=executor, workers=workers or 1
+            )
 
     def _handle_errors(self, results: BaseResults) -> BaseResults:
         """Wrap the results and handle any errors according to the policy"""
@@ -364,21 +449,31 @@ class TakeoutParser:
                 elif self.error_policy == "drop":
                     continue
 
-    def parse(self, cache: bool = False, filter_type: FilterType = None) -> BaseResults:
+    def parse(
+        self,
+        cache: bool = False,
+        filter_type: FilterType = None,
+        workers: Optional[int] = None,
+    ) -> BaseResults:
         """
         Parses the Takeout
 
         if cache is True, using cachew to cache the results
         if filter_type is given, only parses the files which have that type
+        if workers is given, parses files in parallel using that many processes
         """
         if not cache:
-            yield from self._handle_errors(self._parse_raw(filter_type=filter_type))
+            yield from self._handle_errors(
+                self._parse_raw(filter_type=filter_type, workers=workers)
+            )
         else:
-            yield from self._handle_errors(self._cached_parse(filter_type=filter_type))
+            yield from self._handle_errors(
+                self._cached_parse(filter_type=filter_type, workers=workers)
+            )
 
     def _group_by_return_type(
         self, filter_type: FilterType = None
-    ) -> Dict[CacheKey, List[Tuple[Path, BaseResults]]]:
+    ) -> Dict[CacheKey, FileHandlers]:
         """
         Groups the dispatch_map by output model type
         If filter_type is provided, only returns that Model
@@ -386,12 +481,12 @@ class TakeoutParser:
         e.g.:
 
         Activity -> [
-            (filepath, iterator that produces activity)
-            (filepath, iterator that produces activity),
-            (filepath, iterator that produces activity),
+            (filepath, function that produces activity)
+            (filepath, function that produces activity),
+            (filepath, function that produces activity),
         ]
         """
-        handlers: Dict[CacheKey, List[Tuple[Path, BaseResults]]] = defaultdict(list)
+        handlers: Dict[CacheKey, FileHandlers] = defaultdict(list)
         ftype: List[Type[BaseEvent]] = []
         if filter_type is not None:
             if isinstance(filter_type, Sequence):
@@ -406,18 +501,28 @@ class TakeoutParser:
                     f"Provided '{ftype}' as filter, '{ckey}' doesn't match, ignoring '{path}'..."
                 )
                 continue
-            # call the function -- since the parsers are all generators,
-            # this doesn't run here, it just waits till its consumed
-            handlers[ckey].append((path, handler(path)))
+            # the function is called once the results are consumed
+            handlers[ckey].append((path, handler))
         return dict(handlers)
 
     def _depends_on(self) -> str:
         """
-        basename of all files in the takeout directory + google_takeout_version version
+        basename (and size/mtime for files) of everything in the takeout directory + google_takeout_version version
         """
-        file_index: List[str] = list(
-            sorted([str(p.name) for p in self.takeout_dir.rglob("*")])
-        )
+        file_index: List[str] = []
+        for p in self.takeout_dir.rglob("*"):
+            # one stat call per file, instead of is_file() and then stat()
+            try:
+                st: Optional[os.stat_result] = p.stat()
+            except OSError:
+                # e.g. a broken symlink, which is_file() treated as not a file
+                st = None
+            if st is not None and stat.S_ISREG(st.st_mode):
+                # if a file is modified, invalidates the cache for it
+                file_index.append(f"{p.name}:{st.st_size}:{int(st.st_mtime)}")
+            else:
+                file_index.append(str(p.name))
+        file_index.sort()
         # store version at the beginning of hash
         # if pip version changes, invalidates old results and re-computes
         file_index.insert(0, f"google_takeout_version: {_google_takeout_version}")
@@ -436,21 +541,25 @@ class TakeoutParser:
             part = os.path.join(*self.takeout_dir.parts[1:])
         return str(base / part / _cache_key_to_str(cache_key))
 
-    def _cached_parse(self, filter_type: FilterType = None) -> BaseResults:
+    def _cached_parse(
+        self, filter_type: FilterType = None, workers: Optional[int] = None
+    ) -> BaseResults:
         handlers = self._group_by_return_type(filter_type=filter_type)
-        for cache_key, result_tuples in handlers.items():
-            _ret_type: Any = _cache_key_to_type(cache_key)
-
-            def _func() -> Iterator[Res[_ret_type]]:  # type: ignore[valid-type]
-                for path, itr in result_tuples:
-                    self._log_handler(path, itr)
-                    yield from itr
-
-            cached_itr: Callable[[], BaseResults] = cachew(
-                depends_on=lambda: self._depends_on(),
-                cache_path=lambda: self._determine_cache_path(cache_key),
-                force_file=True,
-                logger=logger,
-            )(_func)
-
-            yield from cached_itr()
+        # each group is cached separately, but they all share one pool
+        with _process_pool(workers) as executor:
+            for cache_key, file_handlers in handlers.items():
+                _ret_type: Any = _cache_key_to_type(cache_key)
+
+                def _func() -> Iterator[Res[_ret_type]]:  # type: ignore[valid-type]
+                    yield from self._parse_files(
+                        file_handlers, executor=executor, workers=workers or 1
+                    )
+
+                cached_itr: Callable[[], BaseResults] = cachew(
+                    depends_on=lambda: self._depends_on(),
+                    cache_path=lambda: self._determine_cache_path(cache_key),
+                    force_file=True,
+                    logger=logger,
+                )(_func)
+
+                yield from cached_itr()
@@ -10,11 +10,30 @@ def parse_datetime_millis(d: Union[str, float, int]) -> datetime:
     return parse_datetime_sec(int(d) / 1000)
 
 
-def parse_json_utc_date(ds: str) -> datetime:
-    utc_naive = datetime.fromisoformat(ds.rstrip("Z"))
-    return utc_naive.replace(tzinfo=timezone.utc)
+def _as_utc(dt: datetime) -> datetime:
+    # the common case, timestamps ending with 'Z'
+    if dt.tzinfo is timezone.utc:
+        return dt
+    # no offset, assume UTC
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
 
 
-def test_parse_utc_date() -> None:
-    expected = datetime(2021, 9, 30, 1, 44, 33, tzinfo=timezone.utc)
-    assert parse_json_utc_date("2021-09-30T01:44:33.000Z") == expected
+def _parse_json_utc_date_isoformat(ds: str) -> datetime:
+    # fromisoformat only accepts a trailing 'Z' on python3.11+, so swap it
+    # for the offset, to parse as an aware datetime directly in the common case
+    if ds.endswith("Z"):
+        ds = ds[:-1] + "+00:00"
+    return _as_utc(datetime.fromisoformat(ds))
+
+
+try:
+    # optional dependency, parses ISO 8601 timestamps in C
+    from ciso8601 import parse_datetime as _ciso8601_parse_datetime
+
+    def parse_json_utc_date(ds: str) -> datetime:
+        return _as_utc(_ciso8601_parse_datetime(ds))
+
+except ImportError:
+    parse_json_utc_date = _parse_json_utc_date_isoformat
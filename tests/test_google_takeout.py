@@ -1,3 +1,7 @@
+from pathlib import Path
+
+import pytest
+
 from google_takeout_parser.path_dispatch import TakeoutParser
 from google_takeout_parser.locales.main import LOCALES
 
@@ -26,3 +30,56 @@ def test_structure_ger() -> None:
     assert len(m) == 7
 
     assert tk._guess_locale(takeout_dir=tk.takeout_dir) == [LOCALES["DE"]]
+
+
+def _write_mini_takeout(takeout_dir: Path) -> None:
+    chrome = takeout_dir / "Chrome"
+    chrome.mkdir(parents=True)
+    (chrome / "BrowserHistory.json").write_text(
+        '{"Browser History": [{"title": "sean", "url": "https://sean.fish", "time_usec": 1617404690134513}]}'
+    )
+    play_store = takeout_dir / "Google Play Store"
+    play_store.mkdir()
+    (play_store / "Installs.json").write_text(
+        '[{"install": {"doc": {"title": "Discord"}, "firstInstallationTime": "2020-05-25T03:11:53.055Z", "deviceAttribute": {}}}]'
+    )
+    # parsed in the main process, even when using workers
+    location_history = takeout_dir / "Location History"
+    location_history.mkdir()
+    (location_history / "Records.json").write_text(
+        '{"locations": [{"timestampMs": "1512947698030", "latitudeE7": 351324213, "longitudeE7": -1122434441, "accuracy": 10}]}'
+    )
+
+
+def test_parse_workers(tmp_path: Path) -> None:
+    _write_mini_takeout(tmp_path)
+    tk = TakeoutParser(tmp_path, locale_name="EN")
+    serial = list(tk.parse(cache=False))
+    assert len(serial) == 3
+    assert list(tk.parse(cache=False, workers=2)) == serial
+    assert list(tk.parse(cache=False, workers=1)) == serial
+
+
+def test_parse_workers_cached(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        "google_takeout_parser.path_dispatch.takeout_cache_path", tmp_path / "cache"
+    )
+    takeout = tmp_path / "takeout"
+    _write_mini_takeout(takeout)
+    tk = TakeoutParser(takeout, locale_name="EN", cachew_identifier="workers")
+    serial = list(tk.parse(cache=False))
+    # parses into the cache the first time, and reads from it the second
+    assert list(tk.parse(cache=True, workers=2)) == serial
+    assert list(tk.parse(cache=True, workers=2)) == serial
+
+
+def test_depends_on_file_changes(tmp_path: Path) -> None:
+    chrome = tmp_path / "Chrome"
+    chrome.mkdir()
+    history = chrome / "BrowserHistory.json"
+    history.write_text('{"Browser History": []}')
+    tk = TakeoutParser(tmp_path, locale_name="EN")
+    before = tk._depends_on()
+    assert before == tk._depends_on()
+    history.write_text('{"Browser History": [], "other": []}')
+    assert before != tk._depends_on()
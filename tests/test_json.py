@@ -1,228 +1,327 @@
+import copy
 import json
+import dataclasses
 import datetime
+import tempfile
+import zipfile
 from pathlib import Path
-from typing import Iterator, Any
+from typing import Iterator, Any, Callable, Dict, List, Tuple, TypeVar
 
 import pytest
 import google_takeout_parser.parse_json as prj
 from google_takeout_parser import models
 
+T = TypeVar("T")
+
+# short names for the expected datetimes below
+_DT = datetime.datetime
+_UTC = datetime.timezone.utc
+
+
+@pytest.fixture(scope="session")
+def tmp_path_base(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """
+    Base tempdir for these tests, only created once per session
+    """
+    return tmp_path_factory.mktemp("test_json")
+
 
 @pytest.fixture(scope="function")
-def tmp_path_f(
-    request: Any, tmp_path_factory: pytest.TempPathFactory
-) -> Iterator[Path]:
+def tmp_path_f(request: Any, tmp_path_base: Path) -> Iterator[Path]:
     """
     Create a new tempdir every time this runs
     """
     # request is a _pytest.fixture.SubRequest, function that called this
-    assert isinstance(request.function.__name__, str), str(request)
-    assert request.function.__name__.strip(), str(request)
-    tmp_dir = tmp_path_factory.mktemp(request.function.__name__, numbered=True)
-    yield tmp_dir
-
-
-def test_parse_activity_json(tmp_path_f: Path) -> None:
-    contents = '[{"header": "Discover", "title": "7 cards in your feed", "time": "2021-12-13T03:04:05.007Z", "products": ["Discover"], "locationInfos": [{"name": "At this general area", "url": "https://www.google.com/maps/@?api=1&map_action=map&center=lat,lon&zoom=12", "source": "From your Location History", "sourceUrl": "https://www.google.com/maps/timeline"}], "subtitles": [{"name": "Computer programming"}, {"name": "Computer Science"}, {"name": "PostgreSQL"}, {"name": "Technology"}]}]'
-    fp = tmp_path_f / "file"
-    fp.write_text(contents)
-    res = list(prj._parse_json_activity(fp))
-    assert res[0] == models.Activity(
-        header="Discover",
-        title="7 cards in your feed",
-        time=datetime.datetime(
-            2021, 12, 13, 3, 4, 5, 7000, tzinfo=datetime.timezone.utc
-        ),
-        description=None,
-        titleUrl=None,
-        subtitles=[
-            models.Subtitles("Computer programming", None),
-            models.Subtitles("Computer Science", None),
-            models.Subtitles("PostgreSQL", None),
-            models.Subtitles("Technology", None),
-        ],
-        locationInfos=[
-            models.LocationInfo(
-                "At this general area",
-                "https://www.google.com/maps/@?api=1&map_action=map&center=lat,lon&zoom=12",
-                "From your Location History",
-                "https://www.google.com/maps/timeline",
-            ),
-        ],
-        details=[],
-        products=["Discover"],
-    )
+    name = request.function.__name__
+    # mkdtemp picks a unique name, instead of scanning the directory for the next number like mktemp
+    tmp_dir = tempfile.mkdtemp(prefix=f"{name}_", dir=tmp_path_base)
+    yield Path(tmp_dir)
 
 
-def test_parse_likes_json(tmp_path_f: Path) -> None:
-    contents = """[{"contentDetails": {"videoId": "J1tF-DKKt7k", "videoPublishedAt": "2015-10-05T17:23:15.000Z"}, "etag": "GbLczUV2gsP6j0YQgTcYropUbdY", "id": "TExBNkR0bmJaMktKY2t5VFlmWE93UU5BLkoxdEYtREtLdDdr", "kind": "youtube#playlistItem", "snippet": {"channelId": "UCA6DtnbZ2KJckyTYfXOwQNA", "channelTitle": "Sean B", "description": "\\u30b7\\u30e5\\u30ac\\u30fc\\u30bd\\u30f3\\u30b0\\u3068\\u30d3\\u30bf\\u30fc\\u30b9\\u30c6\\u30c3\\u30d7 \\nSugar Song and Bitter Step\\n\\u7cd6\\u6b4c\\u548c\\u82e6\\u5473\\u6b65\\u9a5f\\nUNISON SQUARE GARDEN\\n\\u7530\\u6df5\\u667a\\u4e5f\\n\\u8840\\u754c\\u6226\\u7dda\\n\\u5e7b\\u754c\\u6230\\u7dda\\nBlood Blockade Battlefront ED\\nArranged by Maybe\\nScore:https://drive.google.com/open?id=0B9Jb1ks6rtrWSk1hX1U0MXlDSUE\\nThx~~", "playlistId": "LLA6DtnbZ2KJckyTYfXOwQNA", "position": 4, "publishedAt": "2020-07-05T18:27:32.000Z", "resourceId": {"kind": "youtube#video", "videoId": "J1tF-DKKt7k"}, "thumbnails": {"default": {"height": 90, "url": "https://i.ytimg.com/vi/J1tF-DKKt7k/default.jpg", "width": 120}, "high": {"height": 360, "url": "https://i.ytimg.com/vi/J1tF-DKKt7k/hqdefault.jpg", "width": 480}, "medium": {"height": 180, "url": "https://i.ytimg.com/vi/J1tF-DKKt7k/mqdefault.jpg", "width": 320}, "standard": {"height": 480, "url": "https://i.ytimg.com/vi/J1tF-DKKt7k/sddefault.jpg", "width": 640}}, "title": "[Maybe]Blood Blockade Battlefront ED \\u30b7\\u30e5\\u30ac\\u30fc\\u30bd\\u30f3\\u30b0\\u3068\\u30d3\\u30bf\\u30fc\\u30b9\\u30c6\\u30c3\\u30d7 Sugar Song and Bitter Step"}, "status": {"privacyStatus": "public"}}]"""
-    fp = tmp_path_f / "file"
-    fp.write_text(contents)
-    res = list(prj._parse_likes(fp))
-    assert res == [
-        models.LikedYoutubeVideo(
-            title="[Maybe]Blood Blockade Battlefront ED シュガーソングとビターステップ "
-            "Sugar Song and Bitter Step",
-            desc="シュガーソングとビターステップ \n"
-            "Sugar Song and Bitter Step\n"
-            "糖歌和苦味步驟\n"
-            "UNISON SQUARE GARDEN\n"
-            "田淵智也\n"
-            "血界戦線\n"
-            "幻界戰線\n"
-            "Blood Blockade Battlefront ED\n"
-            "Arranged by Maybe\n"
-            "Score:https://drive.google.com/open?id=0B9Jb1ks6rtrWSk1hX1U0MXlDSUE\n"
-            "Thx~~",
-            link="https://youtube.com/watch?v=J1tF-DKKt7k",
-            dt=datetime.datetime(2020, 7, 5, 18, 27, 32, tzinfo=datetime.timezone.utc),
-        )
-    ]
+def _parse_contents(
+    tmp_dir: Path, parser: Callable[[Path], Iterator[T]], contents: str
+) -> List[T]:
+    """
+    Write the JSON to a file in tmp_dir and parse it
+    """
+    fp = tmp_dir / "file"
+    fp.write_bytes(contents.encode("utf-8"))
+    return list(parser(fp))
 
 
-def test_parse_app_installs(tmp_path_f: Path) -> None:
-    contents = """[{"install": {"doc": {"documentType": "Android Apps", "title": "Discord - Talk, Video Chat & Hang Out with Friends"}, "firstInstallationTime": "2020-05-25T03:11:53.055Z", "deviceAttribute": {"manufacturer": "motorola", "deviceDisplayName": "motorola moto g(7) play"}, "lastUpdateTime": "2020-08-27T02:55:33.259Z"}}]"""
+_TEST_ACTIVITY_JSON = '[{"header": "Discover", "title": "7 cards in your feed", "time": "2021-12-13T03:04:05.007Z", "products": ["Discover"], "locationInfos": [{"name": "At this general area", "url": "https://www.google.com/maps/@?api=1&map_action=map&center=lat,lon&zoom=12", "source": "From your Location History", "sourceUrl": "https://www.google.com/maps/timeline"}], "subtitles": [{"name": "Computer programming"}, {"name": "Computer Science"}, {"name": "PostgreSQL"}, {"name": "Technology"}]}]'
 
-    fp = tmp_path_f / "file"
-    fp.write_text(contents)
-    res = list(prj._parse_app_installs(fp))
-    assert res == [
-        models.PlayStoreAppInstall(
-            title="Discord - Talk, Video Chat & Hang Out with Friends",
-            dt=datetime.datetime(
-                2020, 5, 25, 3, 11, 53, 55000, tzinfo=datetime.timezone.utc
-            ),
-            device_name="motorola moto g(7) play",
-        )
-    ]
+_TEST_LIKES_JSON = """[{"contentDetails": {"videoId": "J1tF-DKKt7k", "videoPublishedAt": "2015-10-05T17:23:15.000Z"}, "etag": "GbLczUV2gsP6j0YQgTcYropUbdY", "id": "TExBNkR0bmJaMktKY2t5VFlmWE93UU5BLkoxdEYtREtLdDdr", "kind": "youtube#playlistItem", "snippet": {"channelId": "UCA6DtnbZ2KJckyTYfXOwQNA", "channelTitle": "Sean B", "description": "\\u30b7\\u30e5\\u30ac\\u30fc\\u30bd\\u30f3\\u30b0\\u3068\\u30d3\\u30bf\\u30fc\\u30b9\\u30c6\\u30c3\\u30d7 \\nSugar Song and Bitter Step\\n\\u7cd6\\u6b4c\\u548c\\u82e6\\u5473\\u6b65\\u9a5f\\nUNISON SQUARE GARDEN\\n\\u7530\\u6df5\\u667a\\u4e5f\\n\\u8840\\u754c\\u6226\\u7dda\\n\\u5e7b\\u754c\\u6230\\u7dda\\nBlood Blockade Battlefront ED\\nArranged by Maybe\\nScore:https://drive.google.com/open?id=0B9Jb1ks6rtrWSk1hX1U0MXlDSUE\\nThx~~", "playlistId": "LLA6DtnbZ2KJckyTYfXOwQNA", "position": 4, "publishedAt": "2020-07-05T18:27:32.000Z", "resourceId": {"kind": "youtube#video", "videoId": "J1tF-DKKt7k"}, "thumbnails": {"default": {"height": 90, "url": "https://i.ytimg.com/vi/J1tF-DKKt7k/default.jpg", "width": 120}, "high": {"height": 360, "url": "https://i.ytimg.com/vi/J1tF-DKKt7k/hqdefault.jpg", "width": 480}, "medium": {"height": 180, "url": "https://i.ytimg.com/vi/J1tF-DKKt7k/mqdefault.jpg", "width": 320}, "standard": {"height": 480, "url": "https://i.ytimg.com/vi/J1tF-DKKt7k/sddefault.jpg", "width": 640}}, "title": "[Maybe]Blood Blockade Battlefront ED \\u30b7\\u30e5\\u30ac\\u30fc\\u30bd\\u30f3\\u30b0\\u3068\\u30d3\\u30bf\\u30fc\\u30b9\\u30c6\\u30c3\\u30d7 Sugar Song and Bitter Step"}, "status": {"privacyStatus": "public"}}]"""
 
+_TEST_APP_INSTALLS_JSON = """[{"install": {"doc": {"documentType": "Android Apps", "title": "Discord - Talk, Video Chat & Hang Out with Friends"}, "firstInstallationTime": "2020-05-25T03:11:53.055Z", "deviceAttribute": {"manufacturer": "motorola", "deviceDisplayName": "motorola moto g(7) play"}, "lastUpdateTime": "2020-08-27T02:55:33.259Z"}}]"""
 
-def test_location_old(tmp_path_f: Path) -> None:
-    contents = '{"locations": [{"timestampMs": "1512947698030", "latitudeE7": 351324213, "longitudeE7": -1122434441, "accuracy": 10}]}'
-    fp = tmp_path_f / "file"
-    fp.write_text(contents)
-    res = list(prj._parse_location_history(fp))
-    assert res == [
-        models.Location(
-            lng=-112.2434441,
-            lat=35.1324213,
-            dt=datetime.datetime(
-                2017, 12, 10, 23, 14, 58, tzinfo=datetime.timezone.utc
-            ),
-            accuracy=10.0,
-        ),
-    ]
+_TEST_LOCATION_OLD_JSON = '{"locations": [{"timestampMs": "1512947698030", "latitudeE7": 351324213, "longitudeE7": -1122434441, "accuracy": 10}]}'
 
+_TEST_LOCATION_NEW_JSON = '{"locations": [{"latitudeE7": 351324213, "longitudeE7": -1122434441, "accuracy": 10, "deviceTag": -80241446968629135069, "deviceDesignation": "PRIMARY", "timestamp": "2017-12-10T23:14:58.030Z"}]}'
 
-def test_location_new(tmp_path_f: Path) -> None:
-    contents = '{"locations": [{"latitudeE7": 351324213, "longitudeE7": -1122434441, "accuracy": 10, "deviceTag": -80241446968629135069, "deviceDesignation": "PRIMARY", "timestamp": "2017-12-10T23:14:58.030Z"}]}'
-    fp = tmp_path_f / "file"
-    fp.write_text(contents)
-    res = list(prj._parse_location_history(fp))
-    assert res == [
-        models.Location(
-            lng=-112.2434441,
-            lat=35.1324213,
-            dt=datetime.datetime(
-                2017, 12, 10, 23, 14, 58, 30000, tzinfo=datetime.timezone.utc
-            ),
-            accuracy=10.0,
-        ),
-    ]
+_TEST_CHROME_HISTORY_JSON = '{"Browser History": [{"page_transition": "LINK", "title": "sean", "url": "https://sean.fish", "client_id": "W1vSb98l403jhPeK==", "time_usec": 1617404690134513}]}'
 
 
-def test_chrome_history(tmp_path_f: Path) -> None:
-    contents = '{"Browser History": [{"page_transition": "LINK", "title": "sean", "url": "https://sean.fish", "client_id": "W1vSb98l403jhPeK==", "time_usec": 1617404690134513}]}'
-    fp = tmp_path_f / "file"
-    fp.write_text(contents)
-    res = list(prj._parse_chrome_history(fp))
-    assert res == [
-        models.ChromeHistory(
-            title="sean",
-            url="https://sean.fish",
-            dt=datetime.datetime(
-                2021, 4, 2, 23, 4, 50, 134513, tzinfo=datetime.timezone.utc
-            ),
+_EXPECTED_ACTIVITY = models.Activity(
+    header="Discover",
+    title="7 cards in your feed",
+    time=_DT(2021, 12, 13, 3, 4, 5, 7000, tzinfo=_UTC),
+    description=None,
+    titleUrl=None,
+    subtitles=[
+        models.Subtitles("Computer programming", None),
+        models.Subtitles("Computer Science", None),
+        models.Subtitles("PostgreSQL", None),
+        models.Subtitles("Technology", None),
+    ],
+    locationInfos=[
+        models.LocationInfo(
+            "At this general area",
+            "https://www.google.com/maps/@?api=1&map_action=map&center=lat,lon&zoom=12",
+            "From your Location History",
+            "https://www.google.com/maps/timeline",
         ),
-    ]
+    ],
+    details=[],
+    products=["Discover"],
+)
 
+_EXPECTED_LIKE = models.LikedYoutubeVideo(
+    title="[Maybe]Blood Blockade Battlefront ED シュガーソングとビターステップ "
+    "Sugar Song and Bitter Step",
+    desc="シュガーソングとビターステップ \n"
+    "Sugar Song and Bitter Step\n"
+    "糖歌和苦味步驟\n"
+    "UNISON SQUARE GARDEN\n"
+    "田淵智也\n"
+    "血界戦線\n"
+    "幻界戰線\n"
+    "Blood Blockade Battlefront ED\n"
+    "Arranged by Maybe\n"
+    "Score:https://drive.google.com/open?id=0B9Jb1ks6rtrWSk1hX1U0MXlDSUE\n"
+    "Thx~~",
+    link="https://youtube.com/watch?v=J1tF-DKKt7k",
+    dt=_DT(2020, 7, 5, 18, 27, 32, tzinfo=_UTC),
+)
 
-def test_semantic_location_history(tmp_path_f: Path) -> None:
-    data = {
-        "timelineObjects": [
+_EXPECTED_APP_INSTALL = models.PlayStoreAppInstall(
+    title="Discord - Talk, Video Chat & Hang Out with Friends",
+    dt=_DT(2020, 5, 25, 3, 11, 53, 55000, tzinfo=_UTC),
+    device_name="motorola moto g(7) play",
+)
+
+_EXPECTED_LOCATION_OLD = models.Location(
+    lng=-112.2434441,
+    lat=35.1324213,
+    dt=_DT(2017, 12, 10, 23, 14, 58, tzinfo=_UTC),
+    accuracy=10.0,
+)
+
+_EXPECTED_LOCATION_NEW = models.Location(
+    lng=-112.2434441,
+    lat=35.1324213,
+    dt=_DT(2017, 12, 10, 23, 14, 58, 30000, tzinfo=_UTC),
+    accuracy=10.0,
+)
+
+_EXPECTED_CHROME_HISTORY = models.ChromeHistory(
+    title="sean",
+    url="https://sean.fish",
+    dt=_DT(2021, 4, 2, 23, 4, 50, 134513, tzinfo=_UTC),
+)
+
+# name: (parser, file contents, expected results)
+_PARSE_CASES: Dict[str, Tuple[Callable[[Path], Iterator[Any]], str, List[Any]]] = {
+    "activity": (
+        prj._parse_json_activity,
+        _TEST_ACTIVITY_JSON,
+        [_EXPECTED_ACTIVITY],
+    ),
+    "likes": (prj._parse_likes, _TEST_LIKES_JSON, [_EXPECTED_LIKE]),
+    "app_installs": (
+        prj._parse_app_installs,
+        _TEST_APP_INSTALLS_JSON,
+        [_EXPECTED_APP_INSTALL],
+    ),
+    "location_old": (
+        prj._parse_location_history,
+        _TEST_LOCATION_OLD_JSON,
+        [_EXPECTED_LOCATION_OLD],
+    ),
+    "location_new": (
+        prj._parse_location_history,
+        _TEST_LOCATION_NEW_JSON,
+        [_EXPECTED_LOCATION_NEW],
+    ),
+    "chrome_history": (
+        prj._parse_chrome_history,
+        _TEST_CHROME_HISTORY_JSON,
+        [_EXPECTED_CHROME_HISTORY],
+    ),
+}
+
+
+@pytest.mark.parametrize("name", list(_PARSE_CASES))
+def test_parse(tmp_path_f: Path, name: str) -> None:
+    parser, contents, expected = _PARSE_CASES[name]
+    assert _parse_contents(tmp_path_f, parser, contents) == expected
+
+
+def test_location_history_zip_path(tmp_path_f: Path) -> None:
+    # objects which mimic Path, like zipfile.Path, can be passed to the parsers too
+    zp = tmp_path_f / "takeout.zip"
+    with zipfile.ZipFile(zp, "w") as zf:
+        zf.writestr("Records.json", _TEST_LOCATION_NEW_JSON)
+    with zipfile.ZipFile(zp) as zf:
+        res = list(prj._parse_location_history(zipfile.Path(zf, "Records.json")))  # type: ignore[arg-type]
+    assert res == [_EXPECTED_LOCATION_NEW]
+
+
+def test_parse_activity_not_list(tmp_path_f: Path) -> None:
+    res = _parse_contents(
+        tmp_path_f, prj._parse_json_activity, '{"header": "Discover"}'
+    )
+    assert len(res) == 1
+    assert isinstance(res[0], RuntimeError)
+    assert "isn't a list" in str(res[0])
+
+
+def test_location_empty_list(tmp_path_f: Path) -> None:
+    res = _parse_contents(tmp_path_f, prj._parse_location_history, '{"locations": []}')
+    assert res == []
+
+
+def test_location_missing_key(tmp_path_f: Path) -> None:
+    res = _parse_contents(tmp_path_f, prj._parse_location_history, '{"other": []}')
+    assert len(res) == 1
+    assert isinstance(res[0], RuntimeError)
+    assert "no 'locations' key" in str(res[0])
+
+
+def test_semantic_location_not_dict(tmp_path_f: Path) -> None:
+    res = _parse_contents(tmp_path_f, prj._parse_semantic_location_history, "[]")
+    assert len(res) == 1
+    assert isinstance(res[0], RuntimeError)
+    assert "isn't a dict" in str(res[0])
+
+
+def test_semantic_location_missing_key_order(tmp_path_f: Path) -> None:
+    # reports the first missing key in the order they're listed in, not alphabetically
+    res = _parse_contents(
+        tmp_path_f,
+        prj._parse_semantic_location_history,
+        '{"timelineObjects": [{"placeVisit": {}}]}',
+    )
+    assert len(res) == 1
+    assert isinstance(res[0], RuntimeError)
+    assert "no 'location' key" in str(res[0])
+
+
+def test_check_required_keys_order() -> None:
+    assert (
+        prj._check_required_keys(
+            {"longitudeE7": 1},
+            prj._sem_required_location_keys,
+            prj._sem_required_location_keys_set,
+        )
+        == "placeId"
+    )
+
+
+_TEST_PLACE_VISIT = {
+    "placeVisit": {
+        "location": {
+            "latitudeE7": 555555555,
+            "longitudeE7": -1066666666,
+            "placeId": "JK4E4P",
+            "address": "address",
+            "name": "name",
+            "sourceInfo": {"deviceTag": 987654321},
+            "locationConfidence": 60.45,
+        },
+        "duration": {
+            "startTimestamp": "2017-12-10T23:29:25.026Z",
+            "endTimestamp": "2017-12-11T01:20:06.106Z",
+        },
+        "placeConfidence": "MEDIUM_CONFIDENCE",
+        "centerLatE7": 555555555,
+        "centerLngE7": -1666666666,
+        "visitConfidence": 65.45,
+        "otherCandidateLocations": [
             {
-                "placeVisit": {
-                    "location": {
-                        "latitudeE7": 555555555,
-                        "longitudeE7": -1066666666,
-                        "placeId": "JK4E4P",
-                        "address": "address",
-                        "name": "name",
-                        "sourceInfo": {"deviceTag": 987654321},
-                        "locationConfidence": 60.45,
-                    },
-                    "duration": {
-                        "startTimestamp": "2017-12-10T23:29:25.026Z",
-                        "endTimestamp": "2017-12-11T01:20:06.106Z",
-                    },
-                    "placeConfidence": "MEDIUM_CONFIDENCE",
-                    "centerLatE7": 555555555,
-                    "centerLngE7": -1666666666,
-                    "visitConfidence": 65.45,
-                    "otherCandidateLocations": [
-                        {
-                            "latitudeE7": 423984239,
-                            "longitudeE7": -1565656565,
-                            "placeId": "XPRK4E4P",
-                            "address": "address2",
-                            "name": "name2",
-                            "locationConfidence": 24.475897,
-                        }
-                    ],
-                    "editConfirmationStatus": "NOT_CONFIRMED",
-                    "locationConfidence": 55,
-                    "placeVisitType": "SINGLE_PLACE",
-                    "placeVisitImportance": "MAIN",
-                }
+                "latitudeE7": 423984239,
+                "longitudeE7": -1565656565,
+                "placeId": "XPRK4E4P",
+                "address": "address2",
+                "name": "name2",
+                "locationConfidence": 24.475897,
             }
-        ]
+        ],
+        "editConfirmationStatus": "NOT_CONFIRMED",
+        "locationConfidence": 55,
+        "placeVisitType": "SINGLE_PLACE",
+        "placeVisitImportance": "MAIN",
     }
-    fp = tmp_path_f / "file"
-    fp.write_text(json.dumps(data))
-    res = list(prj._parse_semantic_location_history(fp))
+}
+
+# serialized once, instead of in the test body
+_TEST_SEMANTIC_LOCATION_JSON = json.dumps({"timelineObjects": [_TEST_PLACE_VISIT]})
+
+_EXPECTED_PLACE_VISIT = models.PlaceVisit(
+    lat=55.5555555,
+    lng=-106.6666666,
+    centerLat=55.5555555,
+    centerLng=-166.6666666,
+    name="name",
+    address="address",
+    locationConfidence=60.45,
+    placeId="JK4E4P",
+    startTime=_DT(2017, 12, 10, 23, 29, 25, 26000, tzinfo=_UTC),
+    endTime=_DT(2017, 12, 11, 1, 20, 6, 106000, tzinfo=_UTC),
+    sourceInfoDeviceTag=987654321,
+    placeConfidence="MEDIUM_CONFIDENCE",
+    placeVisitImportance="MAIN",
+    placeVisitType="SINGLE_PLACE",
+    visitConfidence=65.45,
+    editConfirmationStatus="NOT_CONFIRMED",
+    otherCandidateLocations=[
+        models.CandidateLocation(
+            lat=42.3984239,
+            lng=-156.5656565,
+            name="name2",
+            address="address2",
+            locationConfidence=24.475897,
+            placeId="XPRK4E4P",
+            sourceInfoDeviceTag=None,
+        )
+    ],
+)
+
+
+def test_semantic_location_history(tmp_path_f: Path) -> None:
+    res = _parse_contents(
+        tmp_path_f, prj._parse_semantic_location_history, _TEST_SEMANTIC_LOCATION_JSON
+    )
     obj = res[0]
     assert not isinstance(obj, Exception)
-    # remove JSON, compare manually below
-    assert obj == models.PlaceVisit(
-        lat=55.5555555,
-        lng=-106.6666666,
-        centerLat=55.5555555,
-        centerLng=-166.6666666,
-        name="name",
-        address="address",
-        locationConfidence=60.45,
-        placeId="JK4E4P",
-        startTime=datetime.datetime(
-            2017, 12, 10, 23, 29, 25, 26000, tzinfo=datetime.timezone.utc
-        ),
-        endTime=datetime.datetime(
-            2017, 12, 11, 1, 20, 6, 106000, tzinfo=datetime.timezone.utc
-        ),
-        sourceInfoDeviceTag=987654321,
-        placeConfidence="MEDIUM_CONFIDENCE",
-        placeVisitImportance="MAIN",
-        placeVisitType="SINGLE_PLACE",
-        visitConfidence=65.45,
-        editConfirmationStatus="NOT_CONFIRMED",
-        otherCandidateLocations=[
-            models.CandidateLocation(
-                lat=42.3984239,
-                lng=-156.5656565,
-                name="name2",
-                address="address2",
-                locationConfidence=24.475897,
-                placeId="XPRK4E4P",
-                sourceInfoDeviceTag=None,
-            )
-        ],
-    )
+    assert obj == _EXPECTED_PLACE_VISIT
+
+
+def test_semantic_location_history_large_int(tmp_path_f: Path) -> None:
+    # wider than 64 bits, which the C ijson backends only parse without use_float=True.
+    # in the second item, so an error here would happen after something was already streamed
+    device_tag = -80241446968629135069
+    second: Dict[str, Any] = copy.deepcopy(_TEST_PLACE_VISIT)
+    second["placeVisit"]["location"]["sourceInfo"]["deviceTag"] = device_tag
+    contents = json.dumps({"timelineObjects": [_TEST_PLACE_VISIT, second]})
+    res = _parse_contents(tmp_path_f, prj._parse_semantic_location_history, contents)
+    assert res == [
+        _EXPECTED_PLACE_VISIT,
+        dataclasses.replace(_EXPECTED_PLACE_VISIT, sourceInfoDeviceTag=device_tag),
+    ]
+    obj = res[1]
+    assert isinstance(obj, models.PlaceVisit)
+    assert isinstance(obj.sourceInfoDeviceTag, int)
+    # the other numbers are streamed as Decimals, and converted
+    assert isinstance(obj.visitConfidence, float)
+    assert isinstance(obj.locationConfidence, float)
@@ -0,0 +1,19 @@
+from datetime import datetime, timezone
+
+from google_takeout_parser.time_utils import (
+    parse_json_utc_date,
+    _parse_json_utc_date_isoformat,
+)
+
+
+def test_parse_utc_date() -> None:
+    expected = datetime(2021, 9, 30, 1, 44, 33, tzinfo=timezone.utc)
+    # both implementations should parse the same way, whether or not ciso8601 is installed
+    for parse in {parse_json_utc_date, _parse_json_utc_date_isoformat}:
+        assert parse("2021-09-30T01:44:33.000Z") == expected
+        assert parse("2021-09-30T01:44:33+00:00") == expected
+        assert parse("2021-09-30T03:44:33+02:00") == expected
+        assert parse("2021-09-30T01:44:33") == expected
+        assert parse("2021-09-30") == datetime(2021, 9, 30, tzinfo=timezone.utc)
+        for ds in ("2021-09-30T03:44:33+02:00", "2021-09-30T01:44:33"):
+            assert parse(ds).tzinfo is timezone.utc